@@ -1,72 +1,383 @@
 #!/usr/bin/env python3
 import sys
-import json
 import os
-from datetime import datetime
+import argparse
+from operator import itemgetter
+import time
+
+try:
+    import orjson
+except ImportError:
+    # orjson が無い環境では標準ライブラリの json で代替する
+    orjson = None
+    import json
 
 TASKS_FILE = 'tasks.json'
+JOURNAL_FILE = 'tasks.log'
+
+# ジャーナルの件数が生存タスク数のこの倍数を超えたらスナップショットに書き戻す
+COMPACT_RATIO = 4
+
+# get_timestamp で使用する秒までの書式
+TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%S'
+
+# get_timestamp が最後に整形した (UNIX秒, 秒までの文字列)
+timestamp_cache = (None, '')
+
+# タスクが持つ項目 (スナップショットの列の並び)
+TASK_FIELDS = ('id', 'description', 'status', 'createdAt', 'updatedAt')
+
+# 一覧表示の1行分の書式と、それに埋め込むタスクの項目
+TASK_LINE_FORMAT = 'ID: %s, Description: %s, Status: %s, CreatedAt: %s, UpdatedAt: %s'
+TASK_LINE_FIELDS = itemgetter(*TASK_FIELDS)
+
+def json_loads(raw):
+    """
+    JSONのバイト列をPythonオブジェクトに変換する関数。
+    orjson が利用可能な場合はそちらを使用する。
+    引数:
+        raw: UTF-8でエンコードされたJSON (bytes または memoryview)
+    返り値: 変換後のオブジェクト
+    例外:
+        ValueError: JSONとして不正な場合 (json.JSONDecodeError / orjson.JSONDecodeError)
+    """
+    if orjson is not None:
+        return orjson.loads(raw)
+    # 標準ライブラリの json は memoryview を受け付けないため bytes に変換する
+    return json.loads(bytes(raw))
+
+def json_dumps(obj):
+    """
+    PythonオブジェクトをUTF-8のJSONバイト列に変換する関数。
+    orjson が利用可能な場合はそちらを使用する。
+    読み込み時に解析するバイト数を減らすため、空白を入れない形式で出力する。
+    引数:
+        obj: 変換するオブジェクト
+    返り値: JSON (バイト列)
+    """
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
 
 def load_tasks():
     """
-    タスクをJSONファイルから読み込む関数。
-    ファイルが存在しない場合は空のタスクリストを返す。
-    例外が発生した場合はエラーメッセージを標準エラー出力に表示し、空のタスクリストを返す。
-    返り値: { "tasks": [...] }
+    タスクを読み込む関数。
+    スナップショット (tasks.json) を読み込んだ後、ジャーナル (tasks.log) に追記された
+    変更イベントを順に適用して最新の状態を復元する。
+    ID による検索を O(1) で行えるよう、タスクは ID をキーとした辞書に変換して返す。
+    ファイルが存在しない場合は空のタスク辞書を返す。
+    例外が発生した場合はエラーメッセージを標準エラー出力に表示し、空のタスク辞書を返す。
+    この場合は load_failed を True とし、空の状態で既存のファイルを上書きしないよう flush_events が保存を拒否する。
+    返り値: { "tasks": { id: task, ... }, "by_status": { status: { id: task, ... }, ... },
+              "next_id": N, "journal_size": ジャーナルのイベント数, "pending": 未書き込みのイベントのリスト,
+              "journal_committed_size": 末尾に書き込み途中の行がある場合は確定済み部分のバイト数、無い場合は None,
+              "load_failed": 読み込みに失敗した場合は True }
     """
+    data = { "tasks": {}, "by_status": {}, "next_id": 1, "journal_size": 0, "pending": [],
+             "journal_committed_size": None, "load_failed": False }
     try:
-        # 1. ファイルが存在しない場合は {"tasks": []} を返す
-        if not os.path.exists(TASKS_FILE):
-            return { "tasks": [] }
+        # 1. スナップショットを読み込む (存在しない場合は空のまま)
+        if os.path.exists(TASKS_FILE):
+            snapshot = read_snapshot()
 
-        with open(TASKS_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except (IOError, json.JSONDecodeError) as e:
+            # ファイル上のタスクを ID をキーとした辞書とステータス別の索引に登録する (挿入順は保持される)
+            for task in snapshot_tasks(snapshot):
+                insert_task(data, task)
+
+            # next_id を持たない旧形式のファイルは、既存タスクの最大ID + 1 から採番する
+            data['next_id'] = snapshot['next_id'] if 'next_id' in snapshot else max(data['tasks'], default=0) + 1
+
+        # 2. ジャーナルのイベントを先頭から順に適用する
+        if os.path.exists(JOURNAL_FILE):
+            replay_journal(data)
+    except (IOError, ValueError) as e:
         print(f"Error loading tasks: {e}", file=sys.stderr)
-        return { "tasks": [] }
+        return { "tasks": {}, "by_status": {}, "next_id": 1, "journal_size": 0, "pending": [],
+                 "journal_committed_size": None, "load_failed": True }
+
+    return data
+
+def read_snapshot():
+    """
+    スナップショット (JSONファイル) を読み込む関数。
+    ファイルをメモリマップしてそのままパーサーに渡すことで、
+    読み込み用バッファへのコピーを省く。
+    返り値: { "columns": { field: [...], ... }, "next_id": N }
+    例外:
+        IOError: ファイルの読み込みに失敗した場合
+        ValueError: ファイルが空、またはJSONとして不正な場合
+    """
+    import mmap
+
+    with open(TASKS_FILE, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # 先頭から順に読むため、対応するOSでは先読みを有効にする
+            if hasattr(mmap, 'MADV_SEQUENTIAL'):
+                mm.madvise(mmap.MADV_SEQUENTIAL)
+            with memoryview(mm) as view:
+                return json_loads(view)
+
+def snapshot_tasks(snapshot):
+    """
+    スナップショットに含まれるタスクを1件ずつ辞書として取り出す関数。
+    スナップショットは項目ごとの列として保存されており、各列の同じ位置の値を組み合わせてタスクに戻す。
+    タスクのリストとして保存された旧形式のスナップショットもそのまま読み込める。
+    引数:
+        snapshot: read_snapshot で読み込んだスナップショット
+    返り値: タスクのイテレーター
+    例外:
+        ValueError: タスクの列やリストが無い場合、または列の長さが揃っていない場合
+    """
+    if 'columns' not in snapshot:
+        if 'tasks' not in snapshot:
+            raise ValueError("snapshot has neither columns nor tasks")
+        return iter(snapshot['tasks'])
+
+    columns = snapshot['columns']
+    missing = [name for name in TASK_FIELDS if name not in columns]
+    if missing:
+        raise ValueError(f"snapshot is missing columns: {', '.join(missing)}")
+
+    # zip は最短の列に合わせて切り捨てるため、長さの不一致によるタスクの欠落を事前に検出する
+    if len({len(columns[name]) for name in TASK_FIELDS}) > 1:
+        raise ValueError("snapshot columns have different lengths")
+
+    return (dict(zip(TASK_FIELDS, values)) for values in zip(*[columns[name] for name in TASK_FIELDS]))
+
+def replay_journal(data):
+    """
+    ジャーナルのイベントを先頭から順にメモリ上のタスクに適用する関数。
+    イベントは改行まで書き込まれて初めて確定したものとみなす。
+    書き込み途中の末尾の行は適用せずに読み飛ばし、確定済み部分のバイト数を記録する。
+    読み込みだけのコマンドがファイルを書き換えないよう、切り詰めは flush_events の追記直前に行う。
+    引数:
+        data: { "tasks": { id: task, ... }, "next_id": N, "journal_size": N, "journal_committed_size": None }
+    例外:
+        IOError: ファイルの読み込みに失敗した場合
+        ValueError: 確定済みのイベントがJSONとして不正な場合
+    """
+    committed_size = 0
+    with open(JOURNAL_FILE, 'rb') as f:
+        for line in f:
+            if not line.endswith(b'\n'):
+                break
+            apply_event(data, json_loads(line))
+            data['journal_size'] += 1
+            committed_size += len(line)
+        torn = f.tell() != committed_size
+
+    if torn:
+        print("Warning: ignoring incomplete journal entry", file=sys.stderr)
+        data['journal_committed_size'] = committed_size
 
 def save_tasks(data):
     """
-    タスクをJSONファイルに保存する関数。
-    例外が発生した場合はエラーメッセージを標準エラー出力に表示し、例外を再送出する。
+    タスクをスナップショット (JSONファイル) に保存する関数。
+    タスクは項目ごとの列 (ID の列、説明の列、...) として保存し、
+    項目名をタスクごとに繰り返さずに済むようにする。
+    一時ファイルに書き込んでディスクに同期した後に置き換えるため、
+    書き込み途中で中断しても既存のスナップショットが壊れることはない。
+    書き込みに失敗した場合は一時ファイルを削除し、例外を再送出する。
     引数:
-        data: { "tasks": [...] }
+        data: { "tasks": { id: task, ... }, "next_id": N }
     例外:
         IOError: ファイルの書き込みに失敗した場合
     """
+    tasks = data['tasks'].values()
+    snapshot = {
+        "columns": { name: [task[name] for task in tasks] for name in TASK_FIELDS },
+        "next_id": data['next_id'],
+    }
+    tmp_file = TASKS_FILE + '.tmp'
     try:
-        with open(TASKS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        with open(tmp_file, 'wb') as f:
+            f.write(json_dumps(snapshot))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, TASKS_FILE)
+
+        # POSIX ではリネーム自体を永続化するため、親ディレクトリも同期する
+        if os.name == 'posix':
+            dir_fd = os.open(os.path.dirname(os.path.abspath(TASKS_FILE)), os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+    except IOError:
+        # 書きかけの一時ファイルを残さない (削除できない場合はそのままにする)
+        try:
+            os.remove(tmp_file)
+        except OSError:
+            pass
+        raise
+
+def insert_task(data, task):
+    """
+    タスクを ID をキーとした辞書とステータス別の索引に登録する関数。
+    同じIDのタスクが既に存在する場合は置き換える。
+    ステータスの文字列は sys.intern で共有し、比較や索引の検索が同一性の確認で済むようにする。
+    引数:
+        data: { "tasks": { id: task, ... }, "by_status": { status: { id: task, ... }, ... } }
+        task: 登録するタスク
+    """
+    task['status'] = sys.intern(task['status'])
+    task_id = task['id']
+    old_task = data['tasks'].get(task_id)
+    if old_task is not None:
+        del data['by_status'][old_task['status']][task_id]
+
+    data['tasks'][task_id] = task
+    data['by_status'].setdefault(task['status'], {})[task_id] = task
+
+def apply_event(data, event):
+    """
+    変更イベントをメモリ上のタスクに適用する関数。
+    ステータス別の索引も合わせて更新する。
+    同じイベントを二度適用しても結果が変わらないため、コンパクション途中で
+    中断してジャーナルが残った場合も安全に再適用できる。
+    引数:
+        data: { "tasks": { id: task, ... }, "by_status": {...}, "next_id": N }
+        event: {"op": "add", "task": {...}} / {"op": "update", "id": N, "fields": {...}} /
+               {"op": "delete", "id": N}
+    """
+    tasks = data['tasks']
+    by_status = data['by_status']
+    op = event['op']
+
+    if op == 'add':
+        # 書き込み前のイベントが後続の変更で書き換わらないよう、コピーを保持する
+        task = dict(event['task'])
+        insert_task(data, task)
+        data['next_id'] = max(data['next_id'], task['id'] + 1)
+    elif op == 'update':
+        task = tasks.get(event['id'])
+        if task is None:
+            return
+
+        old_status = task['status']
+        task.update(event['fields'])
+        if 'status' in event['fields']:
+            task['status'] = sys.intern(task['status'])
+            if task['status'] != old_status:
+                # ステータスが変わる場合は索引のバケットを移動する
+                del by_status[old_status][task['id']]
+                by_status.setdefault(task['status'], {})[task['id']] = task
+    elif op == 'delete':
+        task = tasks.pop(event['id'], None)
+        if task is not None:
+            del by_status[task['status']][task['id']]
+
+def record_event(data, event):
+    """
+    変更イベントをメモリ上のタスクに適用し、未書き込みのイベントとして保持する関数。
+    ファイルへの書き込みは flush_events でまとめて行う。
+    引数:
+        data: { "tasks": { id: task, ... }, "next_id": N, "pending": [...] }
+        event: 記録する変更イベント
+    """
+    apply_event(data, event)
+    data['pending'].append(event)
+
+def flush_events(data):
+    """
+    未書き込みのイベントをジャーナルの末尾にまとめて追記する関数。
+    書き込み量は変更内容の大きさに比例し、タスクの総数には依存しない。
+    読み込み時に書き込み途中の末尾の行が見つかっていた場合は、追記が壊れた行に連結されないよう先に切り詰める。
+    追記したイベントはディスクに同期してから確定とする。
+    コンパクションは行わないため、呼び出し側で完了メッセージを表示した後に compact_if_needed を呼び出す。
+    追記に失敗した場合はエラーメッセージを標準エラー出力に表示し、例外を再送出する。
+    引数:
+        data: { "tasks": { id: task, ... }, "next_id": N, "journal_size": N, "pending": [...],
+                "journal_committed_size": N or None, "load_failed": bool }
+    例外:
+        IOError: ジャーナルへの追記に失敗した場合、またはタスクの読み込みに失敗していた場合
+    """
+    pending = data['pending']
+    if not pending:
+        return
+
+    # 読み込みに失敗した空の状態から変更を保存すると、既存のタスクをIDの重複やコンパクションで失うため拒否する
+    if data['load_failed']:
+        print("Error saving tasks: refusing to save changes because tasks could not be loaded", file=sys.stderr)
+        raise IOError("tasks could not be loaded")
+
+    try:
+        if data['journal_committed_size'] is not None:
+            os.truncate(JOURNAL_FILE, data['journal_committed_size'])
+            data['journal_committed_size'] = None
+
+        with open(JOURNAL_FILE, 'ab') as f:
+            f.write(b''.join(json_dumps(event) + b'\n' for event in pending))
+            f.flush()
+            os.fsync(f.fileno())
     except IOError as e:
         print(f"Error saving tasks: {e}", file=sys.stderr)
         raise
 
-def get_next_id(tasks):
+    data['journal_size'] += len(pending)
+    pending.clear()
+
+def compact_if_needed(data):
     """
-    タスクのリストから次に使用するIDを取得する関数。
-    タスクが存在しない場合は1を返す。
+    ジャーナルが肥大化している場合にコンパクションを行う関数。
+    ジャーナルへの追記が成功した時点で変更は保存済みのため、コンパクションの失敗は警告を表示するだけにとどめ、
+    次回以降の保存時に再試行する。
     引数:
-        tasks: タスクのリスト
+        data: { "tasks": { id: task, ... }, "next_id": N, "journal_size": N }
+    """
+    if data['journal_size'] > COMPACT_RATIO * len(data['tasks']):
+        try:
+            compact(data)
+        except IOError as e:
+            print(f"Warning: failed to compact journal (changes are kept in {JOURNAL_FILE}): {e}", file=sys.stderr)
+
+def compact(data):
+    """
+    現在の状態をスナップショットに書き出し、ジャーナルを空にする関数。
+    スナップショットがディスクに同期されてからジャーナルを切り詰めるため、
+    途中で中断しても次回の読み込みでは残ったジャーナルが再適用されるだけで状態は失われない。
+    引数:
+        data: { "tasks": { id: task, ... }, "next_id": N, "journal_size": N }
+    例外:
+        IOError: ファイルの書き込みに失敗した場合
+    """
+    save_tasks(data)
+    open(JOURNAL_FILE, 'wb').close()
+    data['journal_size'] = 0
+
+def get_next_id(data):
+    """
+    次に使用するIDを取得する関数。
+    IDは単調増加するため、全タスクを走査せずに保存済みの next_id をそのまま返す。
+    引数:
+        data: { "tasks": { id: task, ... }, "next_id": N }
     返り値: 次に使用するID (整数)
     """
-    if not tasks:
-        return 1
-    return max(task['id'] for task in tasks) + 1
+    return data['next_id']
 
 def get_timestamp():
     """
-    現在の日時をISO 8601形式で取得する関数。
-    返り値: 現在の日時 (文字列)
+    現在の日時をISO 8601形式 (ローカル時刻、マイクロ秒まで) で取得する関数。
+    秒までの部分は秒が変わったときだけ整形し直し、それ以外はキャッシュにマイクロ秒を付け足す。
+    返り値: 現在の日時 (文字列、例: "2026-01-17T10:00:00.000000")
     """
-    return datetime.now().isoformat()
-
-def add_task(description):
+    global timestamp_cache
+    seconds, nanoseconds = divmod(time.time_ns(), 1_000_000_000)
+    cached_seconds, prefix = timestamp_cache
+    if seconds != cached_seconds:
+        prefix = time.strftime(TIMESTAMP_FORMAT, time.localtime(seconds))
+        timestamp_cache = (seconds, prefix)
+    return '%s.%06d' % (prefix, nanoseconds // 1000)
+
+def add_task(data, description):
     """
     新しいタスクを追加する関数。
     引数:
+        data: load_tasks で読み込んだタスク
         description: タスクの説明 (文字列)
+    返り値: 完了メッセージ (文字列)
     """
-    data = load_tasks()
-    new_id = get_next_id(data['tasks'])
+    new_id = get_next_id(data)
     now = get_timestamp()
 
     new_task = {
@@ -77,105 +388,90 @@ def add_task(description):
         'updatedAt': now,
     }
 
-    data['tasks'].append(new_task)
-    try:
-        save_tasks(data)
-        print(f"Task added successfully (ID: {new_id})")
-    except IOError:
-        sys.exit(1)
+    record_event(data, { 'op': 'add', 'task': new_task })
+    return f"Task added successfully (ID: {new_id})"
 
-def list_tasks(status_filter=None):
+def list_tasks(data, status_filter=None):
     """
-    タスクを一覧表示する関数。
+    タスクの一覧を組み立てる関数。
     引数:
+        data: load_tasks で読み込んだタスク
         status_filter: フィルタリングするステータス (文字列、オプション)
+    返り値: 表示する一覧 (文字列)
     """
-    data = load_tasks()
     tasks = data['tasks']
-
     if status_filter:
-        tasks = [task for task in tasks if task['status'] == status_filter]
+        # ステータス別の索引から該当するタスクの辞書だけを取り出す
+        tasks = data['by_status'].get(sys.intern(status_filter), {})
 
+    # 該当件数は辞書の長さから O(1) で分かるため、該当なしの場合は何も組み立てずに終了する
     if not tasks:
-        print("No tasks found.")
-        return
+        return "No tasks found."
+
+    if status_filter:
+        # ステータスの変更で索引内の並びが入れ替わるため、ID順に並べ直す
+        tasks = [tasks[task_id] for task_id in sorted(tasks)]
+    else:
+        tasks = tasks.values()
 
-    for task in tasks:
-        print(f"ID: {task['id']}, Description: {task['description']}, Status: {task['status']}, CreatedAt: {task['createdAt']}, UpdatedAt: {task['updatedAt']}")
+    # 全行を1つの文字列にまとめ、呼び出し元で1回で書き出せるようにする
+    return '\n'.join([TASK_LINE_FORMAT % TASK_LINE_FIELDS(task) for task in tasks])
 
-def update_task(task_id, description):
+def update_task(data, task_id, description):
     """
     既存のタスクを更新する関数。
     引数:
+        data: load_tasks で読み込んだタスク
         task_id: 更新するタスクのID (整数)
         description: 新しいタスクの説明 (文字列)
+    返り値: 完了メッセージ (文字列)
     """
-    data = load_tasks()
-    tasks = data['tasks']
+    task = data['tasks'].get(task_id)
 
-    for task in tasks:
-        if task['id'] == task_id:
-            task['description'] = description
-            task['updatedAt'] = get_timestamp()
-            try:
-                save_tasks(data)
-                print(f'Task {task_id} updated successfully')
-            except IOError:
-                sys.exit(1)
-            return
+    if task is None:
+        print(f"Error: Task with ID {task_id} not found", file=sys.stderr)
+        sys.exit(1)
 
-    print(f"Error: Task with ID {task_id} not found", file=sys.stderr)
-    sys.exit(1)
+    fields = { 'description': description, 'updatedAt': get_timestamp() }
+    record_event(data, { 'op': 'update', 'id': task_id, 'fields': fields })
+    return f'Task {task_id} updated successfully'
 
-def delete_task(task_id):
+def delete_task(data, task_id):
     """
     既存のタスクを削除する関数。
     引数:
+        data: load_tasks で読み込んだタスク
         task_id: 削除するタスクのID (整数)
+    返り値: 完了メッセージ (文字列)
     """
-    data = load_tasks()
-    tasks = data['tasks']
-
-    for i, task in enumerate(tasks):
-        if task['id'] == task_id:
-            del tasks[i]
-            try:
-                save_tasks(data)
-                print(f'Task {task_id} deleted successfully')
-            except IOError:
-                sys.exit(1)
-            return
+    if task_id not in data['tasks']:
+        print(f"Error: Task with ID {task_id} not found", file=sys.stderr)
+        sys.exit(1)
 
-    print(f"Error: Task with ID {task_id} not found", file=sys.stderr)
-    sys.exit(1)
+    record_event(data, { 'op': 'delete', 'id': task_id })
+    return f'Task {task_id} deleted successfully'
 
-def mark_task(task_id, status):
+def mark_task(data, task_id, status):
     """
     タスクのステータスを更新する関数。
+    既に指定のステータスになっている場合は何も変更せず、ジャーナルへの書き込みも行わない。
     引数:
+        data: load_tasks で読み込んだタスク
         task_id: 更新するタスクのID (整数)
+        status: 'mark-in-progress' または 'mark-done'
+    返り値: 完了メッセージ (文字列)
     """
-    data = load_tasks()
-    tasks = data['tasks']
+    task = data['tasks'].get(task_id)
 
-    for task in tasks:
-        if task['id'] == task_id:
-            if status == 'mark-in-progress':
-                task['status'] = 'in-progress'
-            elif status == 'mark-done':
-                task['status'] = 'done'
-
-            task['updatedAt'] = get_timestamp()
-
-            try:
-                save_tasks(data)
-                print(f'Task {task_id} marked as {task["status"]} successfully')
-            except IOError:
-                sys.exit(1)
-            return
+    if task is None:
+        print(f"Error: Task with ID {task_id} not found", file=sys.stderr)
+        sys.exit(1)
 
-    print(f"Error: Task with ID {task_id} not found", file=sys.stderr)
-    sys.exit(1)
+    new_status = 'in-progress' if status == 'mark-in-progress' else 'done'
+    if task['status'] != new_status:
+        fields = { 'status': new_status, 'updatedAt': get_timestamp() }
+        record_event(data, { 'op': 'update', 'id': task_id, 'fields': fields })
+    return f'Task {task_id} marked as {task["status"]} successfully'
 
 def show_help():
     help_text = """
@@ -190,70 +486,130 @@ Task Tracker CLI - Usage:
   python task_cli.py list done                  List completed tasks
   python task_cli.py list todo                  List pending tasks
   python task_cli.py list in-progress           List in-progress tasks
+  python task_cli.py batch < commands.txt       Run one command per line from stdin
 """
     print(help_text)
 
-def main():
-    if len(sys.argv) == 1:
-        show_help()
-        return
+def task_id_arg(value):
+    """
+    タスクIDのコマンドライン引数を整数に変換する関数 (argparse の type として使用する)。
+    引数:
+        value: コマンドラインで指定された文字列
+    返り値: タスクID (整数)
+    例外:
+        argparse.ArgumentTypeError: 整数として解釈できない場合
+    """
+    try:
+        return int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError("ID must be a number")
 
-    command = sys.argv[1]
+def build_parser(add_help=True):
+    """
+    コマンドライン引数のパーサーを構築する関数。
+    各サブコマンドには、読み込んだタスクと解析済みの引数を受け取る処理関数を handler として設定する。
+    引数:
+        add_help: -h/--help オプションを追加するかどうか
+                  (batch ではヘルプの表示で正常終了して残りのコマンドが実行されないよう False とする)
+    返り値: argparse.ArgumentParser
+    """
+    parser = argparse.ArgumentParser(prog='task_cli.py', description='Task Tracker CLI', add_help=add_help)
+    subparsers = parser.add_subparsers(dest='command', required=True)
 
-    if command == 'add':
-        if len(sys.argv) < 3:
-            print("Error: Please provide a task description", file=sys.stderr)
-            print("Usage: python task_cli.py add \"description\"")
-            sys.exit(1)
-        description = " ".join(sys.argv[2:])
-        add_task(description)
-    elif command == 'list':
-        status_filter = sys.argv[2] if len(sys.argv) >= 3 else None
-        list_tasks(status_filter)
-    elif command == 'update':
-        if len(sys.argv) < 4:
-            print("Error: Please provide a task ID and description", file=sys.stderr)
-            print("Usage: python task_cli.py update <id> \"description\"")
-            sys.exit(1)
+    add_parser = subparsers.add_parser('add', help='Add a new task', add_help=add_help)
+    add_parser.add_argument('description', nargs='+')
+    add_parser.set_defaults(handler=lambda data, args: add_task(data, " ".join(args.description)))
 
-        try:
-            task_id = int(sys.argv[2])
-        except ValueError:
-            print("Error: ID must be a number", file=sys.stderr)
-            sys.exit(1)
+    update_parser = subparsers.add_parser('update', help='Update a task', add_help=add_help)
+    update_parser.add_argument('id', type=task_id_arg)
+    update_parser.add_argument('description', nargs='+')
+    update_parser.set_defaults(handler=lambda data, args: update_task(data, args.id, " ".join(args.description)))
 
-        description = " ".join(sys.argv[3:])
-        update_task(task_id, description)
-    elif command == 'delete':
-        if len(sys.argv) < 3:
-            print("Error: Please provide a task ID", file=sys.stderr)
-            print("Usage: python task_cli.py delete <id>")
-            sys.exit(1)
+    delete_parser = subparsers.add_parser('delete', help='Delete a task', add_help=add_help)
+    delete_parser.add_argument('id', type=task_id_arg)
+    delete_parser.set_defaults(handler=lambda data, args: delete_task(data, args.id))
 
-        try:
-            task_id = int(sys.argv[2])
-        except ValueError:
-            print("Error: ID must be a number", file=sys.stderr)
-            sys.exit(1)
+    for command in ('mark-in-progress', 'mark-done'):
+        mark_parser = subparsers.add_parser(command, help=f'Mark task as {command[len("mark-"):]}', add_help=add_help)
+        mark_parser.add_argument('id', type=task_id_arg)
+        mark_parser.set_defaults(handler=lambda data, args: mark_task(data, args.id, args.command))
 
-        delete_task(task_id)
-    elif command == 'mark-in-progress' or command == 'mark-done':
-        if len(sys.argv) < 3:
-            print("Error: Please provide a task ID", file=sys.stderr)
-            print("Usage: python task_cli.py mark-in-progress|mark-done <id>")
-            sys.exit(1)
+    list_parser = subparsers.add_parser('list', help='List tasks', add_help=add_help)
+    list_parser.add_argument('status', nargs='?')
+    list_parser.set_defaults(handler=lambda data, args: list_tasks(data, args.status))
+
+    subparsers.add_parser('batch', help='Run one command per line from stdin', add_help=add_help)
+
+    return parser
+
+def execute(data, args):
+    """
+    解析済みのコマンドライン引数に対応する処理を実行する関数。
+    引数:
+        data: load_tasks で読み込んだタスク
+        args: build_parser で構築したパーサーの解析結果
+    返り値: 表示するメッセージ (文字列)
+    """
+    return args.handler(data, args)
 
+def run_batch(lines):
+    """
+    1行に1コマンドずつ記述されたコマンド列を実行する関数。
+    タスクの読み込みとジャーナルへの書き込みを全体で1回ずつにまとめる。
+    各コマンドの出力はジャーナルへの追記が成功した後にまとめて表示するため、追記に失敗した変更の完了メッセージは表示されない。
+    コンパクションは出力の表示後に行い、その失敗は警告のみとして出力や終了コードに影響させない。
+    途中のコマンドが失敗した場合はそこで中断し、それまでの変更を保存してその出力を表示する。
+    引数:
+        lines: コマンドの行の反復可能オブジェクト (空行と # 以降は無視する)
+    """
+    import shlex
+
+    parser = build_parser(add_help=False)
+    data = load_tasks()
+    messages = []
+    try:
+        for line in lines:
+            try:
+                argv = shlex.split(line, comments=True)
+            except ValueError as e:
+                print(f"Error: {e}: {line.rstrip()}", file=sys.stderr)
+                sys.exit(1)
+            if not argv:
+                continue
+
+            args = parser.parse_args(argv)
+            if args.command == 'batch':
+                print("Error: batch cannot be nested", file=sys.stderr)
+                sys.exit(1)
+
+            messages.append(execute(data, args))
+    finally:
         try:
-            task_id = int(sys.argv[2])
-        except ValueError:
-            print("Error: ID must be a number", file=sys.stderr)
+            flush_events(data)
+        except IOError:
             sys.exit(1)
+        if messages:
+            sys.stdout.write('\n'.join(messages) + '\n')
+        compact_if_needed(data)
 
-        mark_task(task_id, command)
-    else:
-        print(f"Error: Unknown command '{command}'", file=sys.stderr)
+def main():
+    if len(sys.argv) == 1:
         show_help()
+        return
+
+    args = build_parser().parse_args()
+    if args.command == 'batch':
+        run_batch(sys.stdin)
+        return
+
+    data = load_tasks()
+    message = execute(data, args)
+    try:
+        flush_events(data)
+    except IOError:
         sys.exit(1)
+    sys.stdout.write(message + '\n')
+    compact_if_needed(data)
 
 if __name__ == '__main__':
     main()